@@ -1,34 +1,80 @@
+import asyncio
+import functools
+import hashlib
 import json
 import os
+import tempfile
+import time
 import google.generativeai as genai
+import typing_extensions
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageTk
 import tkinter as tk
-from tkinter import simpledialog
+import tkinter.font as tkfont
+from tkinter import messagebox
 
-# Scaling factor to convert feet to pixels (1 ft = 5 pixels)
-SCALE = 5
+# Default scaling factor to convert feet to pixels (1 ft = 20 pixels)
+SCALE = 20
 
-def get_layout_from_gemini(total_width, total_height, rooms):
-    """
-    Interacts with Gemini API to generate a floor plan layout and door locations.
+# Directory holding the persistent cache of Gemini layout responses
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai2dlayout")
 
-    Args:
-        total_width (int): Total width of the layout area in feet.
-        total_height (int): Total height of the layout area in feet.
-        rooms (list): List of dictionaries containing room details (name, width, height).
 
-    Returns:
-        layout: List of dictionaries with room coordinates (room_name, x_start, y_start, width, height).
-        doors: List of strings specifying door locations between rooms.
+class _LayoutCache:
     """
+    Persistent key/value store of Gemini layout responses, kept as a JSON file on disk.
 
-    # Prepare room details for the prompt
-    room_details = "\n".join([f"{i}. {room['name']}: {room['width']} ft width, {room['height']} ft height" 
-                              for i, room in enumerate(rooms, start=1)])
+    Writes go through a temporary file and os.replace so a crash or a concurrent
+    run never leaves a half-written cache behind. Write failures are reported and ignored.
+    """
 
-    # Optimized prompt for generating the layout
-    prompt = f"""
-    Generate a floor plan layout within a {total_width}x{total_height} feet area that includes the following rooms:
-    {room_details}
+    def __init__(self, path):
+        self.path = path
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key):
+        return self._load().get(key)
+
+    def __setitem__(self, key, value):
+        data = self._load()
+        data[key] = value
+        # Best effort: a cache that cannot be written must not lose a layout the API already returned
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                os.remove(tmp_path)
+                raise
+        except OSError as e:
+            print(f"Could not write layout cache {self.path}: {e}")
+
+    @staticmethod
+    def key(total_width, total_height, rooms):
+        """Canonical hash of the layout inputs; room order does not affect the key."""
+        payload = {
+            "w": total_width,
+            "h": total_height,
+            "rooms": sorted((r["name"], r["width"], r["height"]) for r in rooms),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+_cache = _LayoutCache(os.path.join(CACHE_DIR, "layouts.json"))
+
+# Static instructions shared by every request, sent as the model's system instruction
+# so each call only carries the variable dimensions and room list
+SYSTEM_INSTRUCTION = """
+    You generate floor plan layouts for a given total area and list of rooms.
 
     Important constraints for door placements:
     1. Ensure a door between the bedrooms and the toilets (bathrooms) and toilets should have only one door.
@@ -49,176 +95,547 @@ def get_layout_from_gemini(total_width, total_height, rooms):
     Ensure the layout fits within the specified area dimensions and satisfies the door placement constraints.
     Make sure the layout fits within the total area dimensions, and return only the JSON output as described.
     """
-    
-    # Gemini API interaction code remains the same
-    genai.configure(api_key="#Ur API Key here")
 
-    generation_config = {
-        "temperature": 1,
-        "top_p": 0.95,
-        "top_k": 64,
-        "max_output_tokens": 8192,
-        "response_mime_type": "text/plain",
-    }
-
-    model = genai.GenerativeModel(
+class Room(typing_extensions.TypedDict):
+    room_name: str
+    x_start: int
+    y_start: int
+    width: int
+    height: int
+
+class LayoutResponse(typing_extensions.TypedDict):
+    layout: list[Room]
+    doors: list[str]
+
+# Attempts per layout request, and the initial delay in seconds before retrying (doubled each retry)
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 1
+
+# Fixed text around the per-call part of the prompt
+PROMPT_HEAD = "Generate a floor plan layout within a "
+PROMPT_TAIL = "\n\nFollow the door placement constraints and return only the JSON output as described.\n"
+
+# Configure the Gemini client once per process
+genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
+
+GENERATION_CONFIG = {
+    "temperature": 1,
+    "top_p": 0.95,
+    "top_k": 64,
+    "max_output_tokens": 8192,
+    "response_mime_type": "application/json",
+    "response_schema": LayoutResponse,
+}
+
+@functools.lru_cache(maxsize=1)
+def _model():
+    """Builds the Gemini model on first use and reuses it for every later call."""
+    return genai.GenerativeModel(
         model_name="gemini-1.5-flash",
-        generation_config=generation_config,
+        generation_config=GENERATION_CONFIG,
+        system_instruction=SYSTEM_INSTRUCTION,
     )
 
-    chat_session = model.start_chat()
-    response = chat_session.send_message(prompt)
-
-    print("Response Object:", response)
-
-    try:
-        raw_response = response._result.candidates[0].content.parts[0].text.strip()
+def build_prompt(total_width, total_height, rooms):
+    """Builds the per-call prompt from the layout dimensions and room list."""
+    # Prepare room details for the prompt
+    lines = [f"{i}. {r['name']}: {r['width']} ft width, {r['height']} ft height" for i, r in enumerate(rooms, 1)]
+    room_details = "\n".join(lines)
 
-        # Clean response and parse as JSON
-        clean_response = raw_response.strip('```json').strip()
-        print("Cleaned Response:", repr(clean_response))
+    # Only the dimensions and room list vary per call; the constraints live in the system instruction
+    return f"{PROMPT_HEAD}{total_width}x{total_height} feet area that includes the following rooms:\n{room_details}{PROMPT_TAIL}"
 
-        # Parse the JSON response
-        response_data = json.loads(clean_response)
-        layout = response_data.get("layout")
-        doors = response_data.get("doors", [])
+def split_door(door, room_names):
+    """
+    Splits a "Room1-Room2" door entry into its two room names.
 
-        return layout, doors
+    Room names may themselves contain hyphens, so every hyphen is tried until both
+    sides name rooms in room_names. Returns None if no split does.
+    """
+    index = door.find("-")
+    while index != -1:
+        room1, room2 = door[:index], door[index + 1:]
+        if room1 in room_names and room2 in room_names:
+            return room1, room2
+        index = door.find("-", index + 1)
+    return None
+
+def _validate_layout(layout, doors):
+    """Raises ValueError unless every room has all its int fields and every door joins two of those rooms."""
+    # The SDK drops `required` when converting LayoutResponse, so the model may omit fields
+    if not isinstance(layout, list) or not isinstance(doors, list):
+        raise ValueError("Layout response is missing its 'layout' or 'doors' list")
+
+    room_names = set()
+    for room in layout:
+        if not isinstance(room, dict) or not isinstance(room.get("room_name"), str):
+            raise ValueError(f"Layout entry without a room name: {room!r}")
+        for field in ("x_start", "y_start", "width", "height"):
+            value = room.get(field)
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f"Room {room['room_name']!r} has no integer {field}")
+        room_names.add(room["room_name"])
+
+    for door in doors:
+        if not isinstance(door, str) or split_door(door, room_names) is None:
+            raise ValueError(f"Door {door!r} does not connect two rooms in the layout")
+
+def _cached_layout(cache_key):
+    """Returns the cached (layout, doors) for cache_key, or None if absent or no longer valid."""
+    cached = _cache.get(cache_key)
+    if cached is None:
+        return None
+    try:
+        _validate_layout(cached.get("layout"), cached.get("doors"))
+    except (AttributeError, ValueError) as e:
+        # Entries written before validation existed may be unusable; regenerate them
+        print(f"Ignoring invalid cached layout: {e}")
+        return None
+    return cached["layout"], cached["doors"]
+
+def _parse_response(response):
+    """Extracts (layout, doors) from a Gemini response, raising ValueError on a malformed one."""
+    print("Response Object:", response)
 
-    except json.JSONDecodeError as e:
-        print(f"Error while parsing response: {e}")
-        raise ValueError("Invalid format received from the API")
-    except IndexError as e:
+    try:
+        raw_response = response.text.strip()
+    except ValueError as e:
+        # response.text raises ValueError when the response has no text parts (e.g. blocked)
         print(f"Error accessing response content: {e}")
         raise ValueError("Invalid response structure received from the API")
     except AttributeError as e:
         print(f"Error accessing response: {e}")
         raise ValueError("Unexpected response structure")
 
+    # Cheap shape check so obviously truncated or non-JSON text is rejected before a full parse
+    if not (raw_response.startswith("{") and raw_response.endswith("}")):
+        print("Response is not a JSON object:", repr(raw_response[:80]))
+        raise ValueError("Invalid format received from the API")
+
+    try:
+        # Structured output mode returns bare JSON matching LayoutResponse
+        response_data = json.loads(raw_response)
+    except json.JSONDecodeError as e:
+        print(f"Error while parsing response: {e}")
+        raise ValueError("Invalid format received from the API")
+
+    layout = response_data.get("layout")
+    doors = response_data.get("doors", [])
+    try:
+        _validate_layout(layout, doors)
+    except ValueError as e:
+        print(f"Error validating response: {e}")
+        raise
+    return layout, doors
+
+def get_layout_from_gemini(total_width, total_height, rooms, use_cache=True):
+    """
+    Interacts with Gemini API to generate a floor plan layout and door locations.
+
+    Args:
+        total_width (int): Total width of the layout area in feet.
+        total_height (int): Total height of the layout area in feet.
+        rooms (list): List of dictionaries containing room details (name, width, height).
+        use_cache (bool): Reuse a stored layout for identical inputs; False always asks the API
+            (the new result is still stored).
+
+    Returns:
+        layout: List of dictionaries with room coordinates (room_name, x_start, y_start, width, height).
+        doors: List of strings specifying door locations between rooms.
+    """
+
+    # Identical inputs reuse the stored response and skip the API call entirely
+    cache_key = _LayoutCache.key(total_width, total_height, rooms)
+    cached = _cached_layout(cache_key) if use_cache else None
+    if cached is not None:
+        return cached
+
+    prompt = build_prompt(total_width, total_height, rooms)
+    for attempt in range(MAX_ATTEMPTS):
+        response = _model().generate_content(prompt)
+        try:
+            layout, doors = _parse_response(response)
+            break
+        except ValueError:
+            # Malformed output is usually transient; back off and ask again
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+            time.sleep(RETRY_DELAY * 2 ** attempt)
+
+    _cache[cache_key] = {"layout": layout, "doors": doors}
+    return layout, doors
+
+async def _generate_async(prompt):
+    """Async counterpart of the request/retry loop in get_layout_from_gemini."""
+    for attempt in range(MAX_ATTEMPTS):
+        response = await _model().generate_content_async(prompt)
+        try:
+            return _parse_response(response)
+        except ValueError:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(RETRY_DELAY * 2 ** attempt)
+
+async def _generate_and_cache_async(cache_key, job):
+    """Generates one job's layout and caches it as soon as it arrives, independently of other jobs."""
+    layout, doors = await _generate_async(build_prompt(*job))
+    _cache[cache_key] = {"layout": layout, "doors": doors}
+    return layout, doors
+
+async def get_layouts_async(jobs):
+    """
+    Generates several layouts concurrently, one Gemini request per distinct uncached job.
+
+    Args:
+        jobs (list): List of (total_width, total_height, rooms) tuples, as accepted by get_layout_from_gemini.
+
+    Returns:
+        List of (layout, doors) tuples in the same order as jobs.
+    """
+    keys = [_LayoutCache.key(*job) for job in jobs]
+    results = [_cached_layout(key) for key in keys]
+
+    # Identical jobs share a single request
+    pending = {}
+    for key, job, cached in zip(keys, jobs, results):
+        if cached is None:
+            pending.setdefault(key, job)
+
+    # Wall-clock time follows the slowest request rather than the sum of all of them.
+    # Every job runs to completion (and is cached) even if another one fails.
+    generated = await asyncio.gather(*(_generate_and_cache_async(key, job) for key, job in pending.items()),
+                                     return_exceptions=True)
+    generated = dict(zip(pending, generated))
+    for result in generated.values():
+        if isinstance(result, BaseException):
+            raise result
+
+    return [cached if cached is not None else generated[key] for key, cached in zip(keys, results)]
+
+# Bit flags returned by classify_adjacency
+ADJACENT_VERTICAL = 1  # Rooms share a left/right wall
+ADJACENT_HORIZONTAL = 2  # Rooms share a top/bottom wall
+
+def classify_adjacency(x1, y1, width1, height1, x2, y2, width2, height2):
+    """
+    Classifies room pairs by shared wall without branching, one bit per adjacency test.
+
+    Args:
+        x1, y1, width1, height1 (ndarray): Coordinates of the first room of each pair.
+        x2, y2, width2, height2 (ndarray): Coordinates of the second room of each pair.
+
+    Returns:
+        Integer array of ADJACENT_VERTICAL | ADJACENT_HORIZONTAL flags; 0 means the rooms do not touch.
+    """
+    vertical = (x1 + width1 == x2) | (x2 + width2 == x1)
+    horizontal = (y1 + height1 == y2) | (y2 + height2 == y1)
+    return vertical * ADJACENT_VERTICAL | horizontal * ADJACENT_HORIZONTAL
+
+def door_rects(door_pairs, scale):
+    """
+    Computes door rectangles on the shared boundary of each pair of adjacent rooms.
+
+    Args:
+        door_pairs (list): List of (room1_coords, room2_coords) tuples, each coords being (x, y, width, height) in pixels.
+        scale (int): Pixels per foot, used to size the doors.
+
+    Returns:
+        List of (x_start, y_start, x_end, y_end) door rectangles; pairs that are not adjacent get no door.
+    """
+    coords = np.array(door_pairs, dtype=np.int64).reshape(-1, 8)
+    x1, y1, width1, height1, x2, y2, width2, height2 = coords.T
+
+    # Left-right adjacency takes precedence over top-bottom adjacency
+    kind = classify_adjacency(x1, y1, width1, height1, x2, y2, width2, height2)
+    vertical = (kind & ADJACENT_VERTICAL) != 0
+
+    x_door = np.where(vertical,
+                      (x1 + x2 + width1) // 2,
+                      (np.maximum(x1, x2) + np.minimum(x1 + width1, x2 + width2)) // 2)
+    y_door = np.where(vertical,
+                      (np.maximum(y1, y2) + np.minimum(y1 + height1, y2 + height2)) // 2,
+                      (y1 + y2 + height1) // 2)
+    door_width = np.where(vertical, scale // 4, scale)
+    door_height = np.where(vertical, scale, scale // 4)
+
+    rects = np.column_stack((x_door, y_door, x_door + door_width, y_door + door_height))
+    return rects[kind != 0].tolist()
+
+# Loaded once; ImageDraw would otherwise load its default font again for every render
+LABEL_FONT = ImageFont.load_default()
+
+def render_shapes(shapes, size, exclude=None):
+    """
+    Draws the floor plan into a single image so the canvas holds one item at rest.
+
+    Args:
+        shapes (list): List of [x, y, width, height, fill, label] entries in pixels, drawn in order.
+        size (tuple): (width, height) of the image in pixels.
+        exclude (int): Index of a shape to leave out, e.g. while it is being dragged.
+
+    Returns:
+        PIL Image of the plan.
+    """
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for index, (x, y, width, height, fill, label) in enumerate(shapes):
+        if index == exclude:
+            continue
+        draw.rectangle((x, y, x + width, y + height), fill=fill, outline="black")
+        if label:
+            draw.multiline_text((x + width // 2, y + height // 2), label, fill="black", font=LABEL_FONT,
+                                anchor="mm", align="center")
+    return image
+
 class BlueprintApp:
-    def __init__(self, root, layout, doors, total_width, total_height):
+    def __init__(self, root, layout, doors, total_width, total_height, scale=SCALE):
         self.root = root
         self.root.title("2D House Blueprint Generator")
-        global SCALE
-        SCALE = 20  # Increase SCALE for larger room sizes
-        canvas_width = total_width * SCALE
-        canvas_height = total_height * SCALE
+        self.scale = scale  # Pixels per foot for this window only
+        canvas_width = total_width * self.scale
+        canvas_height = total_height * self.scale
         self.canvas = tk.Canvas(self.root, bg="white")
         self.canvas.pack(expand=True, fill=tk.BOTH)
+        self._label_font = tkfont.nametofont("TkDefaultFont")  # Shared by every label drawn on the canvas
+
+        # The plan at rest is one image; only the shape being dragged is a live canvas item
+        self._shapes = []  # [x, y, width, height, fill, label] in pixels, in draw order
+        self._image_size = (0, 0)
+        self._background = None  # Keep a reference so Tk does not drop the image
+        self._background_id = None
+        self._drag_index = None
+        self._drag_items = ()
+        self._pending_drag = [0, 0]
+        self._after_id = None
+
+        # One set of drag handlers for the whole canvas instead of per-item tag bindings
+        self.canvas.bind("<ButtonPress-1>", self._on_press)
+        self.canvas.bind("<B1-Motion>", self._on_motion)
+        self.canvas.bind("<ButtonRelease-1>", self._on_release)
+        self.canvas.bind("<Configure>", self._on_resize)
         self.root.after(100, self.center_layout, layout, doors, canvas_width, canvas_height)
 
     def center_layout(self, layout, doors, canvas_width, canvas_height):
-        self.canvas.update_idletasks()
+        # Runs from an after() callback, so the canvas is already mapped and sized
         current_canvas_width = self.canvas.winfo_width()
         current_canvas_height = self.canvas.winfo_height()
         x_offset = max(0, (current_canvas_width - canvas_width) // 2)
         y_offset = max(0, (current_canvas_height - canvas_height) // 2)
+        self._image_size = (max(current_canvas_width, canvas_width), max(current_canvas_height, canvas_height))
         room_rects = {}
 
-        for room in layout:
-            room_rects[room["room_name"]] = self.create_room(
-                room["room_name"], room["x_start"], room["y_start"], room["width"], room["height"], x_offset, y_offset
-            )
-
-        for door in doors:
-            room1, room2 = door.split("-")
-            self.place_door_between_rooms(room_rects[room1], room_rects[room2])
-
-    def create_room(self, name, x, y, width, height, x_offset, y_offset):
-        x *= SCALE
-        y *= SCALE
-        width *= SCALE
-        height *= SCALE
+        # Scale and offset every room's feet coordinates to pixels in one pass
+        coords = np.array([(room["x_start"], room["y_start"], room["width"], room["height"]) for room in layout],
+                          dtype=np.int64).reshape(-1, 4) * self.scale
+        coords[:, :2] += (x_offset, y_offset)
 
-        x += x_offset
-        y += y_offset
+        for (x, y, width, height), room in zip(coords.tolist(), layout):
+            room_rects[room["room_name"]] = self.create_room(room["room_name"], x, y, width, height)
 
-        # Draw the room as a rectangle
-        rect = self.canvas.create_rectangle(x, y, x + width, y + height, fill="lightblue", tags=name)
+        # Resolve every "Room1-Room2" entry to its pair of room coordinates up front
+        door_pairs = [(room_rects[room1], room_rects[room2])
+                      for door in doors for room1, room2 in [split_door(door, room_rects)]]
+        self.place_doors(door_pairs)
 
-        # Add room label (centered text)
-        room_text = f"{name}\n{width // SCALE}x{height // SCALE} ft"
-        text_id = self.canvas.create_text(x + width // 2, y + height // 2, text=room_text, fill="black")
+        # Draw the whole plan as a single image, then flush pending redraws once
+        self.render()
+        self.canvas.update_idletasks()
 
-        # Bind the room to be draggable
-        self.make_draggable(rect, text_id)
+    def create_room(self, name, x, y, width, height):
+        # Coordinates arrive already scaled to pixels and offset by center_layout
+        room_text = f"{name}\n{width // self.scale}x{height // self.scale} ft"
+        self._shapes.append([x, y, width, height, "lightblue", room_text])
 
         return (x, y, width, height)
 
-    def place_door_between_rooms(self, room1_coords, room2_coords):
-        x1, y1, width1, height1 = room1_coords
-        x2, y2, width2, height2 = room2_coords
-
-        door_rect = None  # Initialize door_rect to None
-
-        # Adjust logic for placing doors at shared boundaries between adjacent rooms
-        if x1 + width1 == x2 or x2 + width2 == x1:
-            # Rooms are adjacent on the vertical side (left-right adjacency)
-            x_door = (x1 + x2 + width1) // 2
-            y_door = (max(y1, y2) + min(y1 + height1, y2 + height2)) // 2
-            door_width, door_height = SCALE // 4, SCALE  # Vertical door
-            door_rect = self.canvas.create_rectangle(x_door, y_door, x_door + door_width, y_door + door_height, fill="red", tags="door")
-            
-        elif y1 + height1 == y2 or y2 + height2 == y1:
-            # Rooms are adjacent on the horizontal side (top-bottom adjacency)
-            x_door = (max(x1, x2) + min(x1 + width1, x2 + width2)) // 2
-            y_door = (y1 + y2 + height1) // 2
-            door_width, door_height = SCALE, SCALE // 4  # Horizontal door
-            door_rect = self.canvas.create_rectangle(x_door, y_door, x_door + door_width, y_door + door_height, fill="red", tags="door")
-
-        # Only make the door draggable if door_rect is created
-        if door_rect is not None:
-            self.make_draggable(door_rect, None)
-
-
-    def make_draggable(self, item_id, text_id=None):
-        def on_drag_start(event):
-            # Save the initial position when clicking on the room/door
-            self.canvas.bind("<B1-Motion>", on_drag_motion)
-            self.canvas.bind("<ButtonRelease-1>", on_drag_release)
-            self.canvas.start_x = event.x
-            self.canvas.start_y = event.y
-
-        def on_drag_motion(event):
-            # Calculate the distance moved
-            dx = event.x - self.canvas.start_x
-            dy = event.y - self.canvas.start_y
-
-            # Move the selected item (room/door) and associated text if applicable
+    def place_doors(self, door_pairs):
+        # Door geometry for every pair is computed in one vectorized pass; only the append loops
+        for x_door, y_door, x_end, y_end in door_rects(door_pairs, self.scale):
+            self._shapes.append([x_door, y_door, x_end - x_door, y_end - y_door, "red", None])
+
+    def render(self, exclude=None):
+        image = render_shapes(self._shapes, self._image_size, exclude)
+        self._background = ImageTk.PhotoImage(image)
+        if self._background_id is None:
+            self._background_id = self.canvas.create_image(0, 0, anchor="nw", image=self._background)
+        else:
+            self.canvas.itemconfigure(self._background_id, image=self._background)
+
+    def _grow_image(self, width, height):
+        # The image only ever grows, so nothing drawn earlier is cropped away
+        size = (max(self._image_size[0], width), max(self._image_size[1], height))
+        grown = size != self._image_size
+        self._image_size = size
+        return grown
+
+    def _on_resize(self, event):
+        # Cover a window enlarged after the plan was drawn, so shapes dropped there stay visible
+        if self._background_id is not None and self._grow_image(event.width, event.height):
+            self.render(exclude=self._drag_index)
+
+    def _shape_at(self, x, y):
+        # Topmost shape under the point, matching draw order
+        for index in range(len(self._shapes) - 1, -1, -1):
+            shape_x, shape_y, width, height = self._shapes[index][:4]
+            if shape_x <= x <= shape_x + width and shape_y <= y <= shape_y + height:
+                return index
+        return None
+
+    def _on_press(self, event):
+        index = self._shape_at(event.x, event.y)
+        if index is None:
+            return
+
+        # Promote the grabbed room/door to live canvas items and redraw the image without it
+        x, y, width, height, fill, label = self._shapes[index]
+        items = [self.canvas.create_rectangle(x, y, x + width, y + height, fill=fill)]
+        if label:
+            items.append(self.canvas.create_text(x + width // 2, y + height // 2, text=label, fill="black",
+                                                 font=self._label_font))
+        self._drag_index = index
+        self._drag_items = tuple(items)
+        self.render(exclude=index)
+
+        # Save the initial position when clicking on the room/door
+        self.canvas.start_x = event.x
+        self.canvas.start_y = event.y
+
+    def _on_motion(self, event):
+        if self._drag_index is None:
+            return
+
+        # Accumulate the distance moved; the canvas is moved at most once per idle cycle
+        self._pending_drag[0] += event.x - self.canvas.start_x
+        self._pending_drag[1] += event.y - self.canvas.start_y
+        if self._after_id is None:
+            self._after_id = self.root.after_idle(self._apply_drag)
+
+        # Update the start positions for the next motion
+        self.canvas.start_x = event.x
+        self.canvas.start_y = event.y
+
+    def _apply_drag(self):
+        self._after_id = None
+        dx, dy = self._pending_drag
+        self._pending_drag = [0, 0]
+
+        # Move the selected item (room/door) and associated text if applicable
+        for item_id in self._drag_items:
             self.canvas.move(item_id, dx, dy)
-            if text_id:
-                self.canvas.move(text_id, dx, dy)
 
-            # Update the start positions for the next motion
-            self.canvas.start_x = event.x
-            self.canvas.start_y = event.y
+    def _on_release(self, event):
+        if self._drag_index is None:
+            return
+
+        # Apply any motion still waiting for an idle cycle before reading the final position
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._apply_drag()
+
+        # Bake the dropped shape back into the image at its new position
+        x, y = self.canvas.coords(self._drag_items[0])[:2]
+        shape = self._shapes[self._drag_index]
+        shape[:2] = [round(x), round(y)]
+        self._grow_image(shape[0] + shape[2] + 1, shape[1] + shape[3] + 1)
+        for item_id in self._drag_items:
+            self.canvas.delete(item_id)
+        self._drag_index = None
+        self._drag_items = ()
+        self.render()
+
+class InputDialog(tk.Toplevel):
+    """
+    Single form collecting the layout dimensions and every room at once.
 
-        def on_drag_release(event):
-            # Unbind the motion event after releasing the mouse
-            self.canvas.unbind("<B1-Motion>")
-            self.canvas.unbind("<ButtonRelease-1>")
+    After wait_window() returns, `result` holds (total_width, total_height, rooms),
+    or None if the window was closed without pressing Done.
+    """
 
-        # Bind the mouse press and drag events to the specific item (room/door)
-        self.canvas.tag_bind(item_id, "<ButtonPress-1>", on_drag_start)
-        if text_id:
-            self.canvas.tag_bind(text_id, "<ButtonPress-1>", on_drag_start)
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Input")
+        if parent.winfo_viewable():
+            self.transient(parent)
+        self.result = None
+        self.room_rows = []
+
+        size_frame = tk.Frame(self)
+        size_frame.pack(padx=10, pady=10, fill=tk.X)
+        tk.Label(size_frame, text="Total width (ft):").grid(row=0, column=0, sticky="w")
+        self.width_entry = tk.Entry(size_frame, width=8)
+        self.width_entry.grid(row=0, column=1, padx=5)
+        tk.Label(size_frame, text="Total height (ft):").grid(row=0, column=2, sticky="w")
+        self.height_entry = tk.Entry(size_frame, width=8)
+        self.height_entry.grid(row=0, column=3, padx=5)
+
+        self.rooms_frame = tk.Frame(self)
+        self.rooms_frame.pack(padx=10, fill=tk.X)
+        for column, heading in enumerate(("Room name", "Width (ft)", "Height (ft)")):
+            tk.Label(self.rooms_frame, text=heading).grid(row=0, column=column, sticky="w")
+        self.add_row()
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(padx=10, pady=10, fill=tk.X)
+        tk.Button(button_frame, text="Add row", command=self.add_row).pack(side=tk.LEFT)
+        tk.Button(button_frame, text="Done", command=self.on_done).pack(side=tk.RIGHT)
+
+        self.width_entry.focus_set()
+        # The window must be mapped before it can take a grab (X11 raises "grab failed: window not viewable")
+        self.wait_visibility()
+        self.grab_set()
+
+    def add_row(self):
+        row = len(self.room_rows) + 1
+        entries = (
+            tk.Entry(self.rooms_frame, width=20),
+            tk.Entry(self.rooms_frame, width=8),
+            tk.Entry(self.rooms_frame, width=8),
+        )
+        for column, entry in enumerate(entries):
+            entry.grid(row=row, column=column, padx=2, pady=2)
+        self.room_rows.append(entries)
+
+    def on_done(self):
+        try:
+            total_width = self._positive_int(self.width_entry, "Total width")
+            total_height = self._positive_int(self.height_entry, "Total height")
+            rooms = []
+            for name_entry, width_entry, height_entry in self.room_rows:
+                room_name = name_entry.get().strip()
+                if not room_name:
+                    continue  # Blank rows are ignored
+                rooms.append({
+                    "name": room_name,
+                    "width": self._positive_int(width_entry, f"Width of {room_name}"),
+                    "height": self._positive_int(height_entry, f"Height of {room_name}"),
+                })
+        except ValueError as e:
+            messagebox.showerror("Invalid input", str(e), parent=self)
+            return
+
+        self.result = (total_width, total_height, rooms)
+        self.destroy()
+
+    @staticmethod
+    def _positive_int(entry, label):
+        try:
+            value = int(entry.get())
+        except ValueError:
+            raise ValueError(f"{label} must be a whole number of feet")
+        if value < 1:
+            raise ValueError(f"{label} must be at least 1 ft")
+        return value
 
 def get_user_input():
     root = tk.Tk()
     root.withdraw()
-    total_width = simpledialog.askinteger("Input", "Enter total width of layout (in feet):", minvalue=1)
-    total_height = simpledialog.askinteger("Input", "Enter total height of layout (in feet):", minvalue=1)
-    rooms = []
-
-    while True:
-        room_name = simpledialog.askstring("Input", "Enter room name (or type 'done' to finish):")
-        if room_name.lower() == "done":
-            break
-        room_width = simpledialog.askinteger("Input", f"Enter width of {room_name} (in feet):", minvalue=1)
-        room_height = simpledialog.askinteger("Input", f"Enter height of {room_name} (in feet):", minvalue=1)
-        rooms.append({"name": room_name, "width": room_width, "height": room_height})
+    dialog = InputDialog(root)
+    dialog.wait_window()
+    root.destroy()
 
-    return total_width, total_height, rooms
+    if dialog.result is None:
+        raise SystemExit("Input cancelled")
+    return dialog.result
 
 if __name__ == "__main__":
     total_width, total_height, rooms = get_user_input()